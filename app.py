@@ -4,6 +4,7 @@ from datetime import datetime
 import os
 from models import db, Product, PriceHistory
 from scraper import AmazonScraper
+from archive import PageArchive
 
 def create_app():
     app = Flask(__name__)
@@ -16,7 +17,7 @@ def create_app():
     return app
 
 app = create_app()
-scraper = AmazonScraper()
+scraper = AmazonScraper(archive=PageArchive.from_env())
 
 # ✅ Amazon product URL format checker
 def is_valid_amazon_url(url):
@@ -0,0 +1,210 @@
+"""
+Amazon Price Tracker - Raw Page Archive
+Stores fetched HTML content-addressed and zstd-compressed, with an index
+by ASIN and fetch time so pages can be re-parsed offline.
+"""
+
+import hashlib
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+from scraper import extract_asin
+
+DEFAULT_MAX_MB = 1024
+COMPRESSION_LEVEL = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    raw_size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    last_seen TIMESTAMP NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+    asin TEXT,
+    url TEXT NOT NULL,
+    is_captcha INTEGER NOT NULL DEFAULT 0,
+    fetched_at TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_pages_asin_fetched ON pages (asin, fetched_at);
+CREATE INDEX IF NOT EXISTS ix_pages_sha256 ON pages (sha256);
+CREATE INDEX IF NOT EXISTS ix_blobs_last_seen ON blobs (last_seen);
+"""
+
+
+class PageArchive:
+    """
+    Content-addressed store of raw product pages.
+
+    Each distinct page body is written once to objects/<aa>/<sha256>.html.zst;
+    every fetch adds a row to the sqlite index pointing at that blob. When
+    the compressed total exceeds max_bytes, the least recently seen blobs
+    and their index rows are pruned. The zstandard package is only needed
+    once pages are stored or loaded, so importing this module is free.
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, create=True):
+        """
+        Args:
+            root (str): Directory holding the index and compressed pages
+            max_bytes (int): Retention limit for compressed page data
+            create (bool): Create the archive if it does not exist yet;
+                otherwise raise FileNotFoundError
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(root, 'index.sqlite3')
+
+        if not create:
+            if not os.path.isfile(self.index_path):
+                raise FileNotFoundError(f'No page archive found at {root}')
+            return
+
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls):
+        """Build an archive from PAGE_ARCHIVE_DIR, or return None if unset."""
+        root = os.environ.get('PAGE_ARCHIVE_DIR')
+        if not root:
+            return None
+        max_mb = int(os.environ.get('PAGE_ARCHIVE_MAX_MB', DEFAULT_MAX_MB))
+        return cls(root, max_bytes=max_mb * 1024 * 1024)
+
+    def _connect(self):
+        return sqlite3.connect(
+            self.index_path,
+            timeout=30,
+            detect_types=sqlite3.PARSE_DECLTYPES
+        )
+
+    def _blob_path(self, sha256):
+        return os.path.join(self.root, 'objects', sha256[:2], f'{sha256}.html.zst')
+
+    def store(self, url, raw, is_captcha=False, fetched_at=None):
+        """
+        Archive a fetched page and return its content hash.
+
+        Args:
+            url (str): URL the page was fetched from
+            raw (bytes): Page body exactly as fetched
+            is_captcha (bool): Whether the page was detected as a CAPTCHA/block
+            fetched_at (datetime): Fetch time, defaults to now (UTC)
+        """
+        import zstandard
+
+        fetched_at = fetched_at or datetime.utcnow()
+        sha256 = hashlib.sha256(raw).hexdigest()
+        path = self._blob_path(sha256)
+
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                'SELECT stored_size FROM blobs WHERE sha256 = ?', (sha256,)
+            ).fetchone()
+
+            if row is None or not os.path.exists(path):
+                compressed = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress(raw)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f'{path}.tmp{os.getpid()}'
+                with open(tmp_path, 'wb') as f:
+                    f.write(compressed)
+                os.replace(tmp_path, path)
+                conn.execute(
+                    'INSERT OR REPLACE INTO blobs (sha256, raw_size, stored_size, last_seen) '
+                    'VALUES (?, ?, ?, ?)',
+                    (sha256, len(raw), len(compressed), fetched_at)
+                )
+            else:
+                conn.execute(
+                    'UPDATE blobs SET last_seen = ? WHERE sha256 = ?',
+                    (fetched_at, sha256)
+                )
+
+            conn.execute(
+                'INSERT INTO pages (sha256, asin, url, is_captcha, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (sha256, extract_asin(url), url, int(is_captcha), fetched_at)
+            )
+
+        self.prune()
+        return sha256
+
+    def load(self, sha256):
+        """Return the decompressed page body as bytes."""
+        import zstandard
+
+        with open(self._blob_path(sha256), 'rb') as f:
+            return zstandard.ZstdDecompressor().decompress(f.read())
+
+    def iter_pages(self, asin=None, since=None, until=None, include_captcha=False):
+        """
+        Yield index rows as (id, sha256, asin, url, fetched_at), oldest first.
+
+        Args:
+            asin (str): Only pages for this ASIN
+            since (datetime): Only pages fetched at or after this time
+            until (datetime): Only pages fetched before this time
+            include_captcha (bool): Also yield CAPTCHA/block pages
+        """
+        clauses = []
+        params = []
+        if asin:
+            clauses.append('asin = ?')
+            params.append(asin.upper())
+        if since:
+            clauses.append('fetched_at >= ?')
+            params.append(since)
+        if until:
+            clauses.append('fetched_at < ?')
+            params.append(until)
+        if not include_captcha:
+            clauses.append('is_captcha = 0')
+
+        query = 'SELECT id, sha256, asin, url, fetched_at FROM pages'
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        query += ' ORDER BY fetched_at, id'
+
+        with closing(self._connect()) as conn:
+            yield from conn.execute(query, params)
+
+    def total_size(self):
+        """Return the compressed size of all stored pages in bytes."""
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT COALESCE(SUM(stored_size), 0) FROM blobs').fetchone()[0]
+
+    def prune(self):
+        """
+        Drop least recently seen pages until the archive fits in max_bytes.
+
+        Returns:
+            int: Number of blobs removed
+        """
+        removed = 0
+        with closing(self._connect()) as conn, conn:
+            total = conn.execute('SELECT COALESCE(SUM(stored_size), 0) FROM blobs').fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+
+            for sha256, stored_size in conn.execute(
+                'SELECT sha256, stored_size FROM blobs ORDER BY last_seen'
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute('DELETE FROM pages WHERE sha256 = ?', (sha256,))
+                conn.execute('DELETE FROM blobs WHERE sha256 = ?', (sha256,))
+                try:
+                    os.remove(self._blob_path(sha256))
+                except FileNotFoundError:
+                    pass
+                total -= stored_size
+                removed += 1
+
+        return removed
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Amazon Price Tracker - Offline Re-extraction
+Re-runs the current parser over archived pages to backfill or fix
+price history without any network traffic.
+
+Usage:
+    python reextract.py [--asin ASIN] [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+                        [--workers N] [--dry-run]
+"""
+
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from app import app, db
+from archive import PageArchive
+from models import Product, PriceHistory
+from scraper import AmazonScraper, extract_asin
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+# Existing history entries this close to a page's fetch time are treated as
+# having come from that fetch
+MATCH_WINDOW = timedelta(minutes=5)
+
+# Per-process state for worker pool
+_worker_archive = None
+_worker_scraper = None
+
+
+def _init_worker(archive_root):
+    """Open the archive and parser once per worker process."""
+    global _worker_archive, _worker_scraper
+    _worker_archive = PageArchive(archive_root, max_bytes=float('inf'), create=False)
+    _worker_scraper = AmazonScraper()
+
+
+def _extract_price(sha256):
+    """
+    Parse one archived page.
+
+    Returns:
+        tuple: (sha256, price or None)
+    """
+    try:
+        product_data = _worker_scraper.parse_product(_worker_archive.load(sha256))
+    except Exception as e:
+        logger.warning(f"Could not parse archived page {sha256}: {str(e)}")
+        return sha256, None
+    return sha256, product_data['price'] if product_data else None
+
+
+def _product_lookup():
+    """
+    Index products by URL and by ASIN, loading only the id and url columns.
+
+    Returns:
+        tuple: (dict of url -> product id, dict of ASIN -> list of product ids)
+    """
+    ids_by_url = {}
+    ids_by_asin = {}
+    for product_id, url in db.session.query(Product.id, Product.url).yield_per(1000):
+        ids_by_url[url] = product_id
+        asin = extract_asin(url)
+        if asin:
+            ids_by_asin.setdefault(asin, []).append(product_id)
+    return ids_by_url, ids_by_asin
+
+
+def _resolve_product(url, asin, ids_by_url, ids_by_asin):
+    """
+    Find the product an archived page belongs to.
+
+    The exact URL wins; the ASIN is only used when it maps to a single
+    product, since the same ASIN can be tracked on several marketplaces.
+
+    Returns:
+        tuple: (product id or None, 'unknown_product' or 'ambiguous' if not found)
+    """
+    if url in ids_by_url:
+        return ids_by_url[url], None
+
+    candidates = ids_by_asin.get(asin, [])
+    if len(candidates) == 1:
+        return candidates[0], None
+    if candidates:
+        return None, 'ambiguous'
+    return None, 'unknown_product'
+
+
+def _update_current_prices(latest_prices):
+    """
+    Set Product.current_price from the newest extracted page per product.
+
+    Products updated after that page was fetched are left alone.
+
+    Args:
+        latest_prices (dict): product id -> (fetched_at, price)
+
+    Returns:
+        int: Number of products updated
+    """
+    updated = 0
+    for product_id, (fetched_at, price) in latest_prices.items():
+        product = db.session.get(Product, product_id)
+        if product is None or fetched_at <= product.updated_at:
+            continue
+        if abs(float(product.current_price) - price) < 0.01:
+            continue
+        product.current_price = price
+        product.updated_at = fetched_at
+        updated += 1
+    return updated
+
+
+def _apply_price(product_id, fetched_at, price):
+    """
+    Reconcile one extracted price with the stored history.
+
+    Returns:
+        str: 'fixed', 'added' or 'unchanged'
+    """
+    existing = PriceHistory.query.filter(
+        PriceHistory.product_id == product_id,
+        PriceHistory.timestamp.between(fetched_at - MATCH_WINDOW, fetched_at + MATCH_WINDOW)
+    ).order_by(PriceHistory.timestamp.asc()).first()
+
+    if existing:
+        if abs(float(existing.price) - price) < 0.01:
+            return 'unchanged'
+        existing.price = price
+        return 'fixed'
+
+    # Like the scheduler, only record a history entry when the price moved
+    previous = PriceHistory.query.filter(
+        PriceHistory.product_id == product_id,
+        PriceHistory.timestamp < fetched_at
+    ).order_by(PriceHistory.timestamp.desc()).first()
+
+    if previous and abs(float(previous.price) - price) < 0.01:
+        return 'unchanged'
+
+    db.session.add(PriceHistory(product_id=product_id, price=price, timestamp=fetched_at))
+    db.session.flush()
+    return 'added'
+
+
+def reextract(archive, asin=None, since=None, until=None, workers=None, dry_run=False):
+    """
+    Re-parse archived pages and backfill or fix PriceHistory.
+
+    Args:
+        archive (PageArchive): Archive to read pages from
+        asin (str): Only re-extract pages for this ASIN
+        since (datetime): Only pages fetched at or after this time
+        until (datetime): Only pages fetched before this time
+        workers (int): Parser processes, defaults to the CPU count
+        dry_run (bool): Report changes without committing them
+
+    Returns:
+        dict: Counts of pages by outcome
+    """
+    pages = list(archive.iter_pages(asin=asin, since=since, until=until))
+    stats = {'pages': len(pages), 'unparsed': 0, 'unknown_product': 0, 'ambiguous': 0,
+             'added': 0, 'fixed': 0, 'unchanged': 0, 'current_price_updated': 0}
+
+    if not pages:
+        logger.info("No archived pages matched")
+        return stats
+
+    # Identical page bodies share a blob, so each is parsed only once
+    unique_hashes = list({page[1] for page in pages})
+    logger.info(f"Re-extracting {len(pages)} archived pages ({len(unique_hashes)} unique)")
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(archive.root,)
+    ) as executor:
+        prices = dict(executor.map(_extract_price, unique_hashes, chunksize=16))
+
+    with app.app_context():
+        ids_by_url, ids_by_asin = _product_lookup()
+        latest_prices = {}
+
+        try:
+            for _, sha256, page_asin, url, fetched_at in pages:
+                price = prices.get(sha256)
+                if price is None:
+                    stats['unparsed'] += 1
+                    continue
+
+                product_id, miss = _resolve_product(url, page_asin, ids_by_url, ids_by_asin)
+                if product_id is None:
+                    stats[miss] += 1
+                    continue
+
+                stats[_apply_price(product_id, fetched_at, price)] += 1
+                # Pages are ordered by fetch time, so the last one wins
+                latest_prices[product_id] = (fetched_at, price)
+
+            stats['current_price_updated'] = _update_current_prices(latest_prices)
+
+            if dry_run:
+                db.session.rollback()
+            else:
+                db.session.commit()
+
+        except Exception as e:
+            logger.error(f"Error during re-extraction: {str(e)}")
+            db.session.rollback()
+            raise
+
+    return stats
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def main():
+    """
+    Main entry point for offline re-extraction.
+    """
+    parser = argparse.ArgumentParser(description='Re-extract prices from archived product pages.')
+    parser.add_argument('--archive-dir', default=os.environ.get('PAGE_ARCHIVE_DIR'),
+                        help='Page archive directory (defaults to PAGE_ARCHIVE_DIR)')
+    parser.add_argument('--asin', help='Only re-extract pages for this ASIN')
+    parser.add_argument('--since', type=_parse_date, help='Only pages fetched on or after YYYY-MM-DD')
+    parser.add_argument('--until', type=_parse_date, help='Only pages fetched before YYYY-MM-DD')
+    parser.add_argument('--workers', type=int, default=None, help='Number of parser processes')
+    parser.add_argument('--dry-run', action='store_true', help='Report changes without saving them')
+    args = parser.parse_args()
+
+    if not args.archive_dir:
+        parser.error('no archive directory given; set PAGE_ARCHIVE_DIR or pass --archive-dir')
+
+    try:
+        archive = PageArchive(args.archive_dir, max_bytes=float('inf'), create=False)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+    stats = reextract(
+        archive,
+        asin=args.asin,
+        since=args.since,
+        until=args.until,
+        workers=args.workers,
+        dry_run=args.dry_run
+    )
+
+    logger.info(
+        f"Re-extraction {'(dry run) ' if args.dry_run else ''}completed: "
+        f"{stats['added']} added, {stats['fixed']} fixed, {stats['unchanged']} unchanged, "
+        f"{stats['unparsed']} unparsed, {stats['unknown_product']} without a tracked product, "
+        f"{stats['ambiguous']} ambiguous; {stats['current_price_updated']} current prices updated"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,8 @@ from apscheduler.jobstores.memory import MemoryJobStore
 # Import Flask app components
 from app import app, db
 from models import Product, PriceHistory
-from scraper import AmazonScraper
+from scraper import AmazonScraper, extract_asin
+from archive import PageArchive
 
 # Configure logging
 logging.basicConfig(
@@ -30,6 +31,26 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Number of products loaded per keyset page during a scrape pass
+SCRAPE_CHUNK_SIZE = 500
+
+
+class ProductRef:
+    """
+    Lightweight read-only view of a product used during scrape passes.
+    """
+    
+    __slots__ = ('id', 'url', 'current_price', 'asin')
+    
+    def __init__(self, id, url, current_price):
+        self.id = id
+        self.url = url
+        self.current_price = float(current_price) if current_price is not None else None
+        self.asin = extract_asin(url)
+    
+    def __repr__(self):
+        return f'<ProductRef {self.id} {self.asin}>'
+
 
 class PriceScheduler:
     """
@@ -38,7 +59,7 @@ class PriceScheduler:
     
     def __init__(self):
         """Initialize the scheduler with configuration."""
-        self.scraper = AmazonScraper()
+        self.scraper = AmazonScraper(archive=PageArchive.from_env())
         
         # Configure scheduler
         job_stores = {
@@ -65,38 +86,52 @@ class PriceScheduler:
     def scrape_all_products(self):
         """
         Scrape prices for all tracked products and update database.
+        
+        Products are streamed in keyset-paged chunks of slim ProductRef
+        records, so memory stays flat regardless of catalogue size.
         """
         logger.info("Starting scheduled price scraping...")
         
         try:
             with app.app_context():
-                # Get all active products
-                products = Product.query.filter_by(is_active=True).all()
+                total_products = Product.query.count()
                 
-                if not products:
-                    logger.info("No active products to scrape")
+                if not total_products:
+                    logger.info("No products to scrape")
                     return
                 
-                logger.info(f"Found {len(products)} active products to scrape")
+                logger.info(f"Found {total_products} products to scrape")
                 
                 successful_scrapes = 0
                 failed_scrapes = 0
                 
-                for product in products:
-                    try:
-                        self._scrape_single_product(product)
-                        successful_scrapes += 1
-                        
-                        # Add delay between requests to be respectful
-                        time.sleep(2)
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to scrape product {product.id}: {str(e)}")
-                        failed_scrapes += 1
-                        continue
-                
-                # Commit all changes
-                db.session.commit()
+                for chunk in self._iter_product_chunks():
+                    price_updates = []
+                    history_entries = []
+                    
+                    for product in chunk:
+                        try:
+                            change = self._scrape_single_product(product)
+                            if change:
+                                price_updates.append(change[0])
+                                history_entries.append(change[1])
+                            successful_scrapes += 1
+                            
+                            # Add delay between requests to be respectful
+                            time.sleep(2)
+                            
+                        except Exception as e:
+                            logger.error(f"Failed to scrape product {product.id}: {str(e)}")
+                            failed_scrapes += 1
+                            continue
+                    
+                    # Write the chunk's changes in one short transaction so no
+                    # write lock is held while fetching pages
+                    if price_updates:
+                        db.session.bulk_update_mappings(Product, price_updates)
+                        db.session.add_all(history_entries)
+                    db.session.commit()
+                    db.session.expunge_all()
                 
                 logger.info(
                     f"Scraping completed: {successful_scrapes} successful, "
@@ -107,14 +142,46 @@ class PriceScheduler:
             logger.error(f"Error in scheduled scraping: {str(e)}")
             db.session.rollback()
     
+    def _iter_product_chunks(self, chunk_size=SCRAPE_CHUNK_SIZE):
+        """
+        Yield lists of ProductRef records, paged by primary key.
+        
+        Only the columns needed for scraping are selected, so no Product
+        ORM objects (or their price_history relationship) are loaded.
+        
+        Args:
+            chunk_size (int): Maximum number of products per chunk
+        """
+        last_id = 0
+        while True:
+            rows = (
+                db.session.query(Product.id, Product.url, Product.current_price)
+                .filter(Product.id > last_id)
+                .order_by(Product.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                return
+            
+            yield [ProductRef(*row) for row in rows]
+            last_id = rows[-1][0]
+    
     def _scrape_single_product(self, product):
         """
-        Scrape a single product and update its price history.
+        Scrape a single product and prepare its price update.
+        
+        Nothing is written here; the caller saves the changes for the
+        whole chunk at once.
         
         Args:
-            product (Product): Product object to scrape
+            product (ProductRef): Slim product record to scrape
+        
+        Returns:
+            tuple: (Product update mapping, PriceHistory) if the price
+            changed, otherwise None
         """
-        logger.debug(f"Scraping product: {product.name}")
+        logger.debug(f"Scraping product: {product.asin or product.id}")
         
         try:
             # Scrape current price
@@ -122,86 +189,59 @@ class PriceScheduler:
             
             if not scraped_data or 'price' not in scraped_data:
                 logger.warning(f"No price data found for product {product.id}")
-                return
+                return None
             
             current_price = scraped_data['price']
             
             # Check if price has changed significantly
             if product.current_price and abs(current_price - product.current_price) < 0.01:
                 logger.debug(f"Price unchanged for product {product.id}")
-                return
+                return None
             
-            # Update product information
+            # Product update by primary key
             old_price = product.current_price
-            product.current_price = current_price
-            product.last_checked = datetime.utcnow()
-            
-            # Update other fields if available
-            if 'name' in scraped_data and scraped_data['name']:
-                product.name = scraped_data['name'][:200]  # Limit length
-            
-            if 'image_url' in scraped_data and scraped_data['image_url']:
-                product.image_url = scraped_data['image_url']
+            now = datetime.utcnow()
+            price_update = {
+                'id': product.id,
+                'current_price': current_price,
+                'updated_at': now
+            }
             
             # Create price history entry
             price_history = PriceHistory(
                 product_id=product.id,
                 price=current_price,
-                timestamp=datetime.utcnow()
+                timestamp=now
             )
             
-            db.session.add(price_history)
-            
             # Log price change
+            label = product.asin or f"product {product.id}"
             if old_price:
                 change = current_price - old_price
                 change_percent = (change / old_price) * 100
                 
                 if change < 0:
                     logger.info(
-                        f"Price drop detected for {product.name}: "
+                        f"Price drop detected for {label}: "
                         f"${old_price:.2f} → ${current_price:.2f} "
                         f"({change_percent:.1f}%)"
                     )
-                    
-                    # Check if price dropped below target
-                    if product.target_price and current_price <= product.target_price:
-                        logger.info(
-                            f"Target price reached for {product.name}! "
-                            f"Current: ${current_price:.2f}, Target: ${product.target_price:.2f}"
-                        )
-                        # Here you could add notification logic (email, webhook, etc.)
-                        self._send_price_alert(product, current_price)
                 
                 elif change > 0:
                     logger.info(
-                        f"Price increase for {product.name}: "
+                        f"Price increase for {label}: "
                         f"${old_price:.2f} → ${current_price:.2f} "
                         f"({change_percent:.1f}%)"
                     )
             else:
-                logger.info(f"Initial price set for {product.name}: ${current_price:.2f}")
+                logger.info(f"Initial price set for {label}: ${current_price:.2f}")
+            
+            return price_update, price_history
             
         except Exception as e:
             logger.error(f"Error scraping product {product.id}: {str(e)}")
             raise
     
-    def _send_price_alert(self, product, current_price):
-        """
-        Send alert when target price is reached.
-        
-        Args:
-            product (Product): Product that reached target price
-            current_price (float): Current price of the product
-        """
-        # Placeholder for notification logic
-        # You can implement email, SMS, or webhook notifications here
-        logger.info(f"ALERT: {product.name} reached target price of ${product.target_price:.2f}")
-        
-        # Example: Mark product as alerted to avoid spam
-        # product.alert_sent = True
-        # product.alert_sent_at = datetime.utcnow()
-    
     def cleanup_old_data(self):
         """
         Clean up old price history data to prevent database bloat.
@@ -240,14 +280,12 @@ class PriceScheduler:
         try:
             with app.app_context():
                 total_products = Product.query.count()
-                active_products = Product.query.filter_by(is_active=True).count()
                 recent_history = PriceHistory.query.filter(
                     PriceHistory.timestamp > datetime.utcnow() - timedelta(hours=24)
                 ).count()
                 
                 logger.info(
                     f"Health check - Total products: {total_products}, "
-                    f"Active: {active_products}, "
                     f"Price updates (24h): {recent_history}"
                 )
                 
@@ -2,13 +2,24 @@ import requests
 from bs4 import BeautifulSoup
 import time
 import random
+import re
+
+ASIN_PATTERN = re.compile(r"/(?:dp|gp/product)/([A-Z0-9]{10})", re.IGNORECASE)
+
+
+def extract_asin(url):
+    """Return the 10-character ASIN from an Amazon product URL, or None."""
+    match = ASIN_PATTERN.search(url or "")
+    return match.group(1).upper() if match else None
 
 class AmazonScraper:
-    def __init__(self):
+    def __init__(self, archive=None):
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:131.0) Gecko/20100101 Firefox/131.0",
             "Accept-Language": "en-US,en;q=0.9"
         }
+        # Optional PageArchive that keeps every fetched page for offline re-extraction
+        self.archive = archive
 
     def scrape_product(self, url, max_retries=3):
         """Scrapes product title and price from an Amazon product URL with retry and CAPTCHA detection."""
@@ -20,45 +31,23 @@ class AmazonScraper:
 
                 if self.is_captcha_page(response):
                     print("⚠️ CAPTCHA or blocked request detected. Retrying...")
-                    self.save_debug_html(response.text, f"captcha_attempt_{attempt}.html")
+                    if self.archive:
+                        self.archive_page(url, response.content, is_captcha=True)
+                    else:
+                        self.save_debug_html(response.text, f"captcha_attempt_{attempt}.html")
                     time.sleep(delay)
                     delay *= 2  # exponential backoff
                     continue
 
-                soup = BeautifulSoup(response.content, "html.parser")
-
-                # Extract product title
-                title_tag = soup.find("span", id="productTitle")
-                title = title_tag.get_text(strip=True) if title_tag else None
-
-                # Extract product price
-                price = None
-                price_selectors = [
-                    ("span", {"id": "priceblock_dealprice"}),
-                    ("span", {"id": "priceblock_ourprice"}),
-                    ("span", {"id": "price_inside_buybox"}),
-                    ("span", {"class": "a-price-whole"}),
-                    ("span", {"class": "a-offscreen"})
-                ]
-
-                for tag, attrs in price_selectors:
-                    price_tag = soup.find(tag, attrs=attrs)
-                    if price_tag:
-                        price_str = price_tag.get_text(strip=True).replace(",", "").replace("₹", "").replace("$", "")
-                        try:
-                            price = float(price_str.split()[0])
-                            break
-                        except:
-                            continue
-
-                if not title or price is None:
+                if self.archive:
+                    self.archive_page(url, response.content)
+
+                product_data = self.parse_product(response.content)
+                if not product_data:
                     print("❌ Could not extract title or price.")
                     return None
 
-                return {
-                    "title": title,
-                    "price": price
-                }
+                return product_data
 
             except Exception as e:
                 print(f"🔥 Error on attempt {attempt}: {e}")
@@ -68,6 +57,49 @@ class AmazonScraper:
         print("🛑 Max retries reached. Failed to scrape.")
         return None
 
+    def parse_product(self, html):
+        """Extracts title and price from a product page, or returns None if either is missing."""
+        soup = BeautifulSoup(html, "html.parser")
+
+        # Extract product title
+        title_tag = soup.find("span", id="productTitle")
+        title = title_tag.get_text(strip=True) if title_tag else None
+
+        # Extract product price
+        price = None
+        price_selectors = [
+            ("span", {"id": "priceblock_dealprice"}),
+            ("span", {"id": "priceblock_ourprice"}),
+            ("span", {"id": "price_inside_buybox"}),
+            ("span", {"class": "a-price-whole"}),
+            ("span", {"class": "a-offscreen"})
+        ]
+
+        for tag, attrs in price_selectors:
+            price_tag = soup.find(tag, attrs=attrs)
+            if price_tag:
+                price_str = price_tag.get_text(strip=True).replace(",", "").replace("₹", "").replace("$", "")
+                try:
+                    price = float(price_str.split()[0])
+                    break
+                except:
+                    continue
+
+        if not title or price is None:
+            return None
+
+        return {
+            "title": title,
+            "price": price
+        }
+
+    def archive_page(self, url, raw, is_captcha=False):
+        """Stores the raw bytes of a fetched page in the archive; archive failures never break a scrape."""
+        try:
+            self.archive.store(url, raw, is_captcha=is_captcha)
+        except Exception as e:
+            print(f"⚠️ Could not archive page: {e}")
+
     def is_captcha_page(self, response):
         """Check if response is likely a CAPTCHA or bot block page."""
         if response.status_code != 200: